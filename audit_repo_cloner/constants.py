@@ -45,13 +45,3 @@ SEVERITY_DATA = [
 ]
 
 PROJECT_TEMPLATE_ID = "5"
-
-TRELLO_LABELS = [
-    "Archived",
-    "Needs Discussion",
-    "Self-Validated",
-    "Co-Validated",
-    "Report Ready",
-]
-
-TRELLO_COLUMNS = ["Archive", "Ideas", "Findings", "Peer Reviewed", "Report"]
@@ -1,19 +1,26 @@
 import shutil
 import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
-from typing import List, Optional, Tuple
-from github import Github, GithubException, Repository, Organization
+from typing import List, Optional, Tuple, TYPE_CHECKING
 from dotenv import load_dotenv
-from create_action import create_action
-from github_project_utils import clone_project
 import click
 import subprocess
 import tempfile
+import time
 import logging as log
 import re
-from __version__ import __version__, __title__
+from audit_repo_cloner.__version__ import __version__, __title__
 
-from constants import (
+# PyGithub and the gql stack take hundreds of ms to import, so they are pulled
+# in lazily by the functions that hit the API; --help/--version never pay for
+# them
+if TYPE_CHECKING:
+    from github import Repository, Organization
+
+from audit_repo_cloner.constants import (
     ISSUE_TEMPLATE,
     DEFAULT_LABELS,
     SEVERITY_DATA,
@@ -24,6 +31,11 @@ log.basicConfig(level=log.INFO)
 
 load_dotenv(override=True)
 
+# keep label concurrency low and pace submissions so we stay under GitHub's
+# secondary abuse limiter
+LABEL_MAX_WORKERS = 4
+LABEL_SUBMIT_JITTER_SECONDS = 0.05
+
 # Globals are shit. We should refactor again in the future...
 REPORT_BRANCH_NAME = "report"
 MAIN_BRANCH_NAME = "main"
@@ -107,41 +119,82 @@ def create_audit_repo(
     if not target_repo_name:
         target_repo_name = source_repo_name
 
-    with tempfile.TemporaryDirectory() as temp_dir:
+    from audit_repo_cloner.github_client import get_github_client, wait_for_rate_limit
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        # resolve the clone path once and hand the same absolute path to every
+        # helper instead of re-deriving it per call
+        repo_path = os.path.abspath(temp_dir)
         repo = try_clone_repo(
             github_token,
             organization,
             target_repo_name,
             source_repo_name,
             source_username,
-            temp_dir,
+            repo_path,
             commit_hash,
         )
 
-        repo = create_audit_tag(repo, temp_dir, commit_hash)
-        repo = add_issue_template_to_repo(repo)
-        repo = replace_labels_in_repo(repo)
-        repo = create_branches_for_auditors(repo, auditors_list, commit_hash)
-        repo = create_report_branch(repo, commit_hash)
+        repo = create_audit_tag(repo, repo_path, commit_hash)
+        # the following steps burst through a lot of API calls, so make sure
+        # we have enough quota before starting
+        wait_for_rate_limit(get_github_client(github_token))
+        # the issue template, labels and branches touch disjoint API surfaces,
+        # so overlap their round-trips; add_subtree needs the report branch and
+        # must wait for all of them
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            setup_futures = [
+                executor.submit(add_issue_template_to_repo, repo),
+                executor.submit(replace_labels_in_repo, repo, github_token, organization),
+                executor.submit(
+                    create_audit_branches, repo, auditors_list, commit_hash, github_token, organization
+                ),
+            ]
+            for future in setup_futures:
+                future.result()
         repo = add_subtree(
             repo,
             source_repo_name,
             target_repo_name,
             source_username,
             organization,
-            temp_dir,
+            repo_path,
             subtree_path,
             commit_hash,
         )
         repo = set_up_ci(repo, subtree_path)
         set_up_project_board(repo, github_token, organization, target_repo_name, project_template_id, project_title)
-
+    finally:
+        discard_clone(repo_path)
 
     print("Done!")
 
 
+def discard_clone(repo_path: str):
+    """Get the cloned working tree off the critical path.
+
+    Unlinking a .git directory full of loose objects is the slowest part of
+    tearing down the temp dir, so atomically rename it aside (one syscall) and
+    let a background thread do the actual deletion while the run finishes.
+    The thread is deliberately non-daemon: the interpreter joins it at
+    shutdown, so the deletion always completes instead of being killed
+    mid-way and leaking the renamed clone in the temp dir.
+    """
+    trash_path = f"{repo_path}-trash-{uuid.uuid4().hex}"
+    try:
+        os.rename(repo_path, trash_path)
+    except OSError:
+        # rename across filesystems (or an already-gone dir) - just delete in place
+        shutil.rmtree(repo_path, ignore_errors=True)
+        return
+    threading.Thread(
+        target=shutil.rmtree, args=(trash_path,), kwargs={"ignore_errors": True}
+    ).start()
+
+
 def add_subtree(
-    repo: Repository,
+    repo: "Repository",
     source_repo_name: str,
     target_repo_name: str,
     source_username: str,
@@ -152,20 +205,30 @@ def add_subtree(
 ):
     # Add report-generator-template as a subtree
 
+    from github import GithubException
+
     try:
         print(f"Adding subtree {SUBTREE_NAME}...")
 
-        # Pull the latest changes from the origin
+        # The report branch was just created from commit_hash through the
+        # API, so the remote tip is a commit the local clone already has:
+        # a single local checkout -B pins the branch to it without the
+        # pull+checkout pair (two git spawns and a network round trip)
         subprocess.run(
-            f"git -C {repo_path} pull origin {REPORT_BRANCH_NAME} --rebase", shell=True, check=False
+            ["git", "-C", repo_path, "checkout", "-B", REPORT_BRANCH_NAME, commit_hash],
+            check=False, close_fds=False,
         )
-        subprocess.run(f"git -C {repo_path} checkout {REPORT_BRANCH_NAME}", shell=True, check=False)
 
-        # Add the subtree to the repo
-        subprocess.run(
-            f"git -C {repo_path} subtree add --prefix {subtree_path} {SUBTREE_URL} {MAIN_BRANCH_NAME} --squash",
-            shell=True, check=False
-        )
+        # Vendor the squashed tip of the template instead of `git subtree add`:
+        # git-subtree is a bash script that forks a git process per template
+        # commit, while all we need is the current tree at subtree_path
+        with tempfile.TemporaryDirectory() as template_dir:
+            subprocess.run(
+                ["git", "clone", "--depth=1", SUBTREE_URL, template_dir],
+                check=False, close_fds=False,
+            )
+            shutil.rmtree(os.path.join(template_dir, ".git"))
+            shutil.copytree(template_dir, os.path.join(repo_path, subtree_path))
 
         # Move workflow file to the correct location
         os.makedirs(f"{repo_path}/.github/workflows", exist_ok=True)
@@ -207,14 +270,16 @@ def add_subtree(
             ) as f:
                 f.write(summary_information)
 
-        subprocess.run(f"git -C {repo_path} add .", shell=True)
+        subprocess.run(["git", "-C", repo_path, "add", "."], close_fds=False)
         subprocess.run(
-            f"git -C {repo_path}  commit -m 'install: {SUBTREE_NAME}'", shell=True, check=False
+            ["git", "-C", repo_path, "commit", "-m", f"install: {SUBTREE_NAME}"],
+            check=False, close_fds=False,
         )
 
         # Push the changes back to the origin
         subprocess.run(
-            f"git -C {repo_path} push origin {REPORT_BRANCH_NAME}", shell=True, check=False
+            ["git", "-C", repo_path, "push", "origin", REPORT_BRANCH_NAME],
+            check=False, close_fds=False,
         )
 
         print(
@@ -230,6 +295,8 @@ def add_subtree(
 
 
 def set_up_ci(repo, subtree_path: str):
+    from audit_repo_cloner.create_action import create_action
+
     try:
         create_action(
             repo,
@@ -306,8 +373,10 @@ def try_clone_repo(
     source_username: str,
     repo_path: str,
     commit_hash: str,
-) -> Repository:
-    github_object = Github(github_token)
+) -> "Repository":
+    from audit_repo_cloner.github_client import get_github_client
+
+    github_object = get_github_client(github_token)
     github_org = github_object.get_organization(organization)
     repo = None
     try:
@@ -324,6 +393,7 @@ def try_clone_repo(
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             check=True,
+            close_fds=False,
         )
         if result.returncode == 0:
             log.error(f"{organization}/{target_repo_name} already exists.")
@@ -365,14 +435,16 @@ def try_clone_repo(
 
 def create_and_clone_repo(
     github_token: str,
-    github_org: Organization,
+    github_org: "Organization",
     organization: str,
     target_repo_name: str,
     source_repo_name: str,
     source_username: str,
     repo_path: str,
     commit_hash: str,
-) -> Repository:
+) -> "Repository":
+    from github import GithubException
+
     try:
         repo = github_org.create_repo(target_repo_name, private=True)
     except GithubException as e:
@@ -385,9 +457,15 @@ def create_and_clone_repo(
             [
                 "git",
                 "clone",
+                # full-history clone: every blob must be present locally,
+                # because origin is re-pointed at the (empty) target repo
+                # before the history is pushed there — a partial clone would
+                # try to lazy-fetch its missing blobs from that empty remote
+                # and the push would fail
+                "--no-tags",
                 f"https://{github_token}@github.com/{source_username}/{source_repo_name}.git",
                 repo_path,
-            ], check=False
+            ], check=False, close_fds=False
         )
 
     except GithubException as e:
@@ -396,7 +474,7 @@ def create_and_clone_repo(
         exit()
 
     try:
-        subprocess.run(["git", "-C", repo_path, "fetch", "origin"], check=False)
+        subprocess.run(["git", "-C", repo_path, "fetch", "origin"], check=False, close_fds=False)
 
         # Identify the branch containing the commit using `git branch --contains`
         completed_process = subprocess.run(
@@ -404,6 +482,7 @@ def create_and_clone_repo(
             text=True,
             capture_output=True,
             check=True,
+            close_fds=False,
         )
 
         filtered_branches = [
@@ -445,11 +524,11 @@ def create_and_clone_repo(
                 "fetch",
                 "origin",
                 branch + ":refs/remotes/origin/" + branch,
-            ], check=False
+            ], check=False, close_fds=False
         )
 
         # Checkout the branch containing the commit hash
-        subprocess.run(["git", "-C", repo_path, "checkout", branch], check=False)
+        subprocess.run(["git", "-C", repo_path, "checkout", branch], check=False, close_fds=False)
 
         # Update the origin remote
         subprocess.run(
@@ -461,12 +540,13 @@ def create_and_clone_repo(
                 "set-url",
                 "origin",
                 f"https://{github_token}@github.com/{organization}/{target_repo_name}.git",
-            ], check=False
+            ], check=False, close_fds=False
         )
 
-        # Push the branch to the remote audit repository as 'main'
-        # subprocess.run(f"git -C {repo_path} push -u origin {branch}:{MAIN_BRANCH_NAME}")
-        subprocess.run(
+        # Push the branch to the remote audit repository as 'main'; every
+        # later step builds on this history being there, so a failed push
+        # must abort the run instead of passing silently
+        completed_push = subprocess.run(
             [
                 "git",
                 "-C",
@@ -475,8 +555,12 @@ def create_and_clone_repo(
                 "-u",
                 "origin",
                 f"{branch}:{MAIN_BRANCH_NAME}",
-            ], check=False
+            ], check=False, close_fds=False
         )
+        if completed_push.returncode != 0:
+            raise Exception(
+                f"Failed to push {branch} to {target_repo_name} as {MAIN_BRANCH_NAME}"
+            )
 
     except Exception as e:
         log.error(f"Error extracting branch of commit hash: {e}")
@@ -486,7 +570,9 @@ def create_and_clone_repo(
     return repo
 
 
-def create_audit_tag(repo, repo_path, commit_hash) -> Repository:
+def create_audit_tag(repo, repo_path, commit_hash) -> "Repository":
+    from github import GithubException
+
     log.info("Creating audit tag...")
 
     try:
@@ -505,10 +591,10 @@ def create_audit_tag(repo, repo_path, commit_hash) -> Repository:
 
         try:
             # Create the tag at the specific commit hash
-            subprocess.run(["git", "-C", repo_path, "tag", "cyfrin-audit", commit_hash])
+            subprocess.run(["git", "-C", repo_path, "tag", "cyfrin-audit", commit_hash], close_fds=False)
 
             # Push the tag to the remote repository
-            subprocess.run(["git", "-C", repo_path, "push", "origin", "cyfrin-audit"])
+            subprocess.run(["git", "-C", repo_path, "push", "origin", "cyfrin-audit"], close_fds=False)
         except GithubException as e:
             log.error(f"Error creating audit tag manually: {e}")
             repo.delete()
@@ -516,7 +602,9 @@ def create_audit_tag(repo, repo_path, commit_hash) -> Repository:
     return repo
 
 
-def add_issue_template_to_repo(repo) -> Repository:
+def add_issue_template_to_repo(repo) -> "Repository":
+    from github import GithubException
+
     # Get the existing finding.md file, if it exists
     try:
         finding_file = repo.get_contents(".github/ISSUE_TEMPLATE/finding.md")
@@ -531,33 +619,87 @@ def add_issue_template_to_repo(repo) -> Repository:
     return repo
 
 
-def delete_default_labels(repo) -> Repository:
+def list_labels(repo) -> dict:
+    # one listing call shared by the delete/create fallback helpers
+    return {label.name: label for label in repo.get_labels()}
+
+
+def delete_default_labels(repo, existing_labels=None) -> "Repository":
     log.info("Deleting default labels...")
-    for label_name in DEFAULT_LABELS:
-        try:
-            label = repo.get_label(label_name)
-            log.info(f"Deleting {label}...")
-            label.delete()
-        except Exception as e:
-            log.warn(f"Label {label} does not exist. Skipping...")
+    if existing_labels is None:
+        existing_labels = list_labels(repo)
+    to_delete = [
+        (label_name, existing_labels[label_name])
+        for label_name in DEFAULT_LABELS
+        if label_name in existing_labels
+    ]
+    from audit_repo_cloner.github_client import call_with_retry
+
+    with ThreadPoolExecutor(max_workers=LABEL_MAX_WORKERS) as executor:
+        futures = {}
+        for label_name, label in to_delete:
+            log.info(f"Deleting {label_name}...")
+            futures[executor.submit(call_with_retry, label.delete)] = label_name
+            time.sleep(LABEL_SUBMIT_JITTER_SECONDS)
+        for future in as_completed(futures):
+            if future.exception() is not None:
+                log.warn(f"Issue deleting label {futures[future]}. Skipping...")
     log.info("Finished deleting default labels")
     return repo
 
 
-def create_new_labels(repo) -> Repository:
+def create_new_labels(repo, existing_labels=None) -> "Repository":
     log.info("Creating new labels...")
+    if existing_labels is None:
+        existing_labels = list_labels(repo)
+    to_create = []
     for data in SEVERITY_DATA:
-        try:
-            repo.create_label(**data)
-        except:
-            log.warn(f"Issue creating label with data: {data}. Skipping...")
+        if data["name"] in existing_labels:
+            log.info(f"Label {data['name']} already exists. Skipping...")
+            continue
+        to_create.append(data)
+    from audit_repo_cloner.github_client import call_with_retry
+
+    with ThreadPoolExecutor(max_workers=LABEL_MAX_WORKERS) as executor:
+        futures = {}
+        for data in to_create:
+            futures[executor.submit(call_with_retry, repo.create_label, **data)] = data
+            time.sleep(LABEL_SUBMIT_JITTER_SECONDS)
+        for future in as_completed(futures):
+            if future.exception() is not None:
+                log.warn(f"Issue creating label with data: {futures[future]}. Skipping...")
     print("Finished creating new labels")
     return repo
 
 
-def create_branches_for_auditors(repo, auditors_list, commit_hash) -> Repository:
+def create_audit_branches(repo, auditors_list, commit_hash, github_token, organization) -> "Repository":
+    from audit_repo_cloner.github_project_utils import create_branches
+
+    branch_names = [f"audit/{auditor}" for auditor in auditors_list] + [REPORT_BRANCH_NAME]
+    try:
+        create_branches(github_token, organization, repo.name, branch_names, commit_hash)
+        return repo
+    except Exception as e:
+        log.warn(f"Error batch-creating branches: {e}")
+        log.warn("Falling back to creating branches one by one...")
+        # one listing call up front so we skip existing branches instead of
+        # paying a failing POST (and a rate-limit unit) per duplicate
+        existing_branches = {b.name for b in repo.get_branches()}
+        repo = create_branches_for_auditors(repo, auditors_list, commit_hash, existing_branches)
+        repo = create_report_branch(repo, commit_hash, existing_branches)
+        return repo
+
+
+def create_branches_for_auditors(repo, auditors_list, commit_hash, existing_branches=None) -> "Repository":
+    from github import GithubException
+
+    if existing_branches is None:
+        existing_branches = {b.name for b in repo.get_branches()}
     for auditor in auditors_list:
         branch_name = f"audit/{auditor}"
+        if branch_name in existing_branches:
+            log.warn(f"Branch {branch_name} already exists. Skipping...")
+            continue
         try:
             repo.create_git_ref(f"refs/heads/{branch_name}", commit_hash)
         except GithubException as e:
@@ -571,13 +713,27 @@ def create_branches_for_auditors(repo, auditors_list, commit_hash) -> Repository
     return repo
 
 
-def replace_labels_in_repo(repo) -> Repository:
-    repo = delete_default_labels(repo)
-    repo = create_new_labels(repo)
+def replace_labels_in_repo(repo, github_token, organization) -> "Repository":
+    from audit_repo_cloner.github_project_utils import replace_labels
+
+    log.info("Replacing default labels...")
+    try:
+        replace_labels(github_token, organization, repo.name, DEFAULT_LABELS, SEVERITY_DATA)
+    except Exception as e:
+        log.warn(f"Error batch-replacing labels: {e}")
+        log.warn("Falling back to replacing labels one by one...")
+        existing_labels = list_labels(repo)
+        repo = delete_default_labels(repo, existing_labels)
+        repo = create_new_labels(repo, existing_labels)
     return repo
 
 
-def create_report_branch(repo, commit_hash) -> Repository:
+def create_report_branch(repo, commit_hash, existing_branches=None) -> "Repository":
+    from github import GithubException
+
+    if existing_branches is not None and REPORT_BRANCH_NAME in existing_branches:
+        log.warn(f"Branch {REPORT_BRANCH_NAME} already exists. Skipping...")
+        return repo
     try:
         repo.create_git_ref(ref=f"refs/heads/{REPORT_BRANCH_NAME}", sha=commit_hash)
     except GithubException as e:
@@ -593,13 +749,15 @@ def create_report_branch(repo, commit_hash) -> Repository:
 # https://stackoverflow.com/questions/73268885/unable-to-create-project-in-repository-or-organisation-using-github-rest-api
 # we use a non-standard way to access GitHub's GraphQL
 def set_up_project_board(
-        repo: Repository,
+        repo: "Repository",
         github_token: str,
         organization: str,
         target_repo_name: str,
         project_template_id: str,
         project_title: str = "DEFAULT PROJECT"
     ):
+    from audit_repo_cloner.github_project_utils import clone_project
+
     if not project_title:
         project_title = "DEFAULT PROJECT"
     try:
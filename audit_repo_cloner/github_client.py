@@ -0,0 +1,106 @@
+import threading
+import time
+import logging as log
+from datetime import datetime
+from typing import Dict
+from urllib3.util import Retry
+from github import Github
+
+# Retry transient failures and 429 rate-limit responses at the transport
+# layer with exponential backoff instead of failing hard mid-run. 403 stays
+# out of the forcelist: it is also GitHub's answer for genuine permission
+# problems, which must surface as GithubException immediately — rate-limit
+# 403s (Retry-After present) are handled by call_with_retry instead.
+RETRY_CONFIG = Retry(
+    total=10,
+    backoff_factor=2,
+    status_forcelist=(429, 500, 502, 503, 504),
+    respect_retry_after_header=True,
+)
+
+# One client per token for the lifetime of the process so every API call
+# shares the same underlying connection pool instead of re-doing the
+# TLS handshake.
+_clients: Dict[str, Github] = {}
+
+
+def _serialize_requests(client: Github) -> Github:
+    """Make a client's REST round trips safe for concurrent callers.
+
+    PyGithub's ``Requester`` reuses one cached connection object whose
+    ``request()`` stores verb/url/body as instance attributes that
+    ``getresponse()`` reads back, with no locking — two threads can cross
+    requests (one sent twice, one never, responses swapped). Wrapping the
+    single choke point every request* method funnels through with a lock
+    serializes the round trips; PyGithub objects created on this client
+    can then be used from the worker pools safely, and the pools still
+    overlap REST with GraphQL calls and git subprocesses.
+    """
+    requester = client._Github__requester
+    lock = threading.Lock()
+    request_encode = requester._Requester__requestEncode
+
+    def locked_request_encode(*args, **kwargs):
+        with lock:
+            return request_encode(*args, **kwargs)
+
+    requester._Requester__requestEncode = locked_request_encode
+    return client
+
+
+def get_github_client(github_token: str) -> Github:
+    """Return a shared, thread-safe ``Github`` instance for the given token.
+
+    Repeated calls with the same token reuse the same client (and its
+    connection pool), which keeps requests on a warm HTTPS connection.
+    """
+    client = _clients.get(github_token)
+    if client is None:
+        client = _serialize_requests(Github(github_token, per_page=100, retry=RETRY_CONFIG))
+        _clients[github_token] = client
+    return client
+
+
+def call_with_retry(fn, *args, **kwargs):
+    """Call a PyGithub function, honoring Retry-After on rate-limit errors.
+
+    Retries 403/429 (primary/secondary rate limit) with the server-suggested
+    wait, falling back to exponential backoff. Anything else — including 422
+    already-exists, which callers handle themselves — is raised immediately
+    instead of being silently dropped.
+    """
+    from github import GithubException
+
+    attempts = 5
+    for attempt in range(attempts):
+        try:
+            return fn(*args, **kwargs)
+        except GithubException as e:
+            if e.status not in (403, 429) or attempt == attempts - 1:
+                raise
+            retry_after = (e.headers or {}).get("retry-after")
+            wait_seconds = int(retry_after) if retry_after else 2 ** attempt
+            log.warning(
+                f"Rate limited (HTTP {e.status}); retrying in {wait_seconds}s..."
+            )
+            time.sleep(wait_seconds)
+
+
+def wait_for_rate_limit(client: Github, min_remaining: int = 50):
+    """Sleep until the primary rate limit resets if we are close to it.
+
+    Call this before bursts of mutating calls (label swaps, branch creation)
+    so we don't start a burst we can't finish and then burn retries against
+    a locked-out endpoint.
+    """
+    core = client.get_rate_limit().core
+    if core.remaining >= min_remaining:
+        return
+    # core.reset is a naive UTC datetime in this PyGithub version, so the
+    # "now" it is compared against must be naive UTC as well
+    wait_seconds = (core.reset - datetime.utcnow()).total_seconds() + 1
+    if wait_seconds > 0:
+        log.warning(
+            f"Only {core.remaining} API calls remaining; sleeping {wait_seconds:.0f}s until the rate limit resets..."
+        )
+        time.sleep(wait_seconds)
@@ -1,9 +1,236 @@
+import threading
+from typing import List
 from github import Repository
 from gql import gql, Client
 from gql.transport.requests import RequestsHTTPTransport
 
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+
+# createLabel/deleteLabel are still behind a schema preview
+LABEL_PREVIEW_ACCEPT_HEADER = "application/vnd.github.bane-preview+json"
+
+
+class GraphQLSession:
+    """A gql client held open so consecutive calls share one connection.
+
+    ``Client.execute()`` on its own connects and closes the transport (and
+    its requests.Session) around every call, re-doing the TCP+TLS handshake
+    each time. Connecting once and executing against the live session keeps
+    the connection warm; the lock serializes the threaded callers that
+    share a session.
+    """
+
+    def __init__(self, client: Client):
+        self._session = client.connect_sync()
+        self._lock = threading.Lock()
+
+    def execute(self, document, variable_values: dict = None):
+        with self._lock:
+            return self._session.execute(document, variable_values=variable_values)
+
+
+# one connected session per token/header pair
+_graphql_sessions: dict = {}
+
+
+def make_graphql_client(github_token: str, accept_header: str = None) -> GraphQLSession:
+    session = _graphql_sessions.get((github_token, accept_header))
+    if session is None:
+        headers = {"Authorization": f"Bearer {github_token}"}
+        if accept_header:
+            headers["Accept"] = accept_header
+        transport = RequestsHTTPTransport(
+            url=GITHUB_GRAPHQL_URL,
+            headers=headers,
+            use_json=True,
+            retries=5,
+        )
+        session = GraphQLSession(
+            Client(transport=transport, fetch_schema_from_transport=False)
+        )
+        _graphql_sessions[(github_token, accept_header)] = session
+    return session
+
+
+def get_repo_node_id_and_labels(client: GraphQLSession, organization: str, target_repo_name: str) -> tuple:
+    query = gql(
+        """
+    query GetRepoLabels($owner: String!, $repo_name: String!) {
+        repository(owner: $owner, name: $repo_name) {
+            id
+            labels(first: 100) {
+                nodes {
+                    id
+                    name
+                }
+            }
+        }
+    }
+    """
+    )
+
+    query_variables = {"owner": organization, "repo_name": target_repo_name}
+
+    try:
+        response = client.execute(query, variable_values=query_variables)
+        repo_node_id = response["repository"]["id"]
+        labels = response["repository"]["labels"]["nodes"]
+        return repo_node_id, labels
+    except Exception as e:
+        raise Exception(f"Error occurred while fetching repository labels: {str(e)}")
+
+
+def replace_labels(github_token: str, organization: str, target_repo_name: str, labels_to_delete: List[str], labels_to_create: List[dict]):
+    """
+    Replace the default repository labels with the audit severity labels in a
+    single GraphQL mutation instead of one REST round-trip per label.
+        github_token (str): GitHub personal access token
+        organization (str): GitHub organization name
+        target_repo_name (str): Name of the repository whose labels to replace
+        labels_to_delete (List[str]): Names of the labels to remove, if present
+        labels_to_create (List[dict]): Label data ({"name", "color"}) to create
+    """
+    client = make_graphql_client(github_token, accept_header=LABEL_PREVIEW_ACCEPT_HEADER)
+
+    repo_node_id, existing_labels = get_repo_node_id_and_labels(client, organization, target_repo_name)
+
+    existing_by_name = {label["name"]: label["id"] for label in existing_labels}
+
+    # diff against what's already there so re-runs are idempotent: update
+    # labels that exist (keeping their issue associations), create only the
+    # missing ones, and delete only the unwanted defaults
+    labels_to_update = [data for data in labels_to_create if data["name"] in existing_by_name]
+    labels_to_add = [data for data in labels_to_create if data["name"] not in existing_by_name]
+    delete_ids = [
+        label_id
+        for name, label_id in existing_by_name.items()
+        if name in labels_to_delete
+    ]
+
+    variable_definitions = []
+    mutation_fields = []
+    mutation_variables = {}
+
+    for i, label_id in enumerate(delete_ids):
+        variable_definitions.append(f"$d{i}: DeleteLabelInput!")
+        mutation_fields.append(f"d{i}: deleteLabel(input: $d{i}) {{ clientMutationId }}")
+        mutation_variables[f"d{i}"] = {"id": label_id}
+
+    for i, data in enumerate(labels_to_update):
+        variable_definitions.append(f"$u{i}: UpdateLabelInput!")
+        mutation_fields.append(f"u{i}: updateLabel(input: $u{i}) {{ label {{ id }} }}")
+        mutation_variables[f"u{i}"] = {
+            "id": existing_by_name[data["name"]],
+            "color": data["color"],
+        }
+
+    for i, data in enumerate(labels_to_add):
+        variable_definitions.append(f"$c{i}: CreateLabelInput!")
+        mutation_fields.append(f"c{i}: createLabel(input: $c{i}) {{ label {{ id }} }}")
+        mutation_variables[f"c{i}"] = {
+            "repositoryId": repo_node_id,
+            "name": data["name"],
+            "color": data["color"],
+        }
+
+    if not mutation_fields:
+        return
+
+    replace_labels_mutation = gql(
+        "mutation ReplaceLabels("
+        + ", ".join(variable_definitions)
+        + ") {\n"
+        + "\n".join(mutation_fields)
+        + "\n}"
+    )
+
+    try:
+        client.execute(replace_labels_mutation, variable_values=mutation_variables)
+        print(
+            f"Deleted {len(delete_ids)}, updated {len(labels_to_update)} and created {len(labels_to_add)} labels in one request"
+        )
+    except Exception as e:
+        raise Exception(f"Error occurred while replacing labels: {str(e)}")
+
+
+def get_repo_node_id(client: GraphQLSession, organization: str, target_repo_name: str) -> str:
+    query = gql(
+        """
+    query GetRepoId($owner: String!, $repo_name: String!) {
+        repository(owner: $owner, name: $repo_name) {
+            id
+        }
+    }
+    """
+    )
+
+    query_variables = {"owner": organization, "repo_name": target_repo_name}
+
+    try:
+        response = client.execute(query, variable_values=query_variables)
+        return response["repository"]["id"]
+    except Exception as e:
+        raise Exception(f"Error occurred while getting repo node id: {str(e)}")
+
+
+def create_branches(github_token: str, organization: str, target_repo_name: str, branch_names: List[str], commit_hash: str):
+    """
+    Create several branches pointing at the same commit in one aliased
+    createRef mutation instead of one REST call per branch.
+        github_token (str): GitHub personal access token
+        organization (str): GitHub organization name
+        target_repo_name (str): Name of the repository to create branches in
+        branch_names (List[str]): Short branch names (without refs/heads/)
+        commit_hash (str): Commit SHA the branches should point at
+    """
+    if not branch_names:
+        return
+
+    client = make_graphql_client(github_token)
+    repo_node_id = get_repo_node_id(client, organization, target_repo_name)
+
+    variable_definitions = []
+    mutation_fields = []
+    mutation_variables = {}
+
+    for i, branch_name in enumerate(branch_names):
+        variable_definitions.append(f"$b{i}: CreateRefInput!")
+        mutation_fields.append(f"b{i}: createRef(input: $b{i}) {{ ref {{ id }} }}")
+        mutation_variables[f"b{i}"] = {
+            "repositoryId": repo_node_id,
+            "name": f"refs/heads/{branch_name}",
+            "oid": commit_hash,
+        }
+
+    create_branches_mutation = gql(
+        "mutation CreateBranches("
+        + ", ".join(variable_definitions)
+        + ") {\n"
+        + "\n".join(mutation_fields)
+        + "\n}"
+    )
+
+    try:
+        client.execute(create_branches_mutation, variable_values=mutation_variables)
+        print(f"Created {len(branch_names)} branches in one request")
+    except Exception as e:
+        raise Exception(f"Error occurred while creating branches: {str(e)}")
+
+
+# org and project-template node ids are stable for the lifetime of the
+# process, so cache them and only re-query the (per-repo) repository id
+# when cloning several projects in one run
+_org_node_id_cache: dict = {}
+_project_node_id_cache: dict = {}
+
+
+def get_node_ids(client: GraphQLSession, organization: str, target_repo_name: str, project_template_id: int) -> tuple[str, str, str]:
+    org_node_id = _org_node_id_cache.get(organization)
+    project_node_id = _project_node_id_cache.get((organization, project_template_id))
+    if org_node_id is not None and project_node_id is not None:
+        repo_node_id = get_repo_node_id(client, organization, target_repo_name)
+        return repo_node_id, org_node_id, project_node_id
 
-def get_node_ids(client: Client, organization: str, target_repo_name: str, project_template_id: int) -> tuple[str, str, str]:
     query = gql(
         """
     query GetNodeIds($owner: String!, $repo_name: String!, $project_number: Int!) {
@@ -32,12 +259,14 @@ def get_node_ids(client: Client, organization: str, target_repo_name: str, proje
         # print(f"Node ID of the repository is: {repo_node_id}")
         # print(f"Node ID of the owner is: {org_node_id}")
         # print(f"Node ID of the project is: {project_node_id}")
+        _org_node_id_cache[organization] = org_node_id
+        _project_node_id_cache[(organization, project_template_id)] = project_node_id
         return repo_node_id, org_node_id, project_node_id
     except Exception as e:
         raise Exception(f"Error occurred while getting owner/repo node ids: {str(e)}")
 
 
-def copy_project(client: Client, owner_node_id: str, project_template_id: str, project_title: str) -> str:
+def copy_project(client: GraphQLSession, owner_node_id: str, project_template_id: str, project_title: str) -> str:
     # GraphQL Mutation for copying a project
     create_project_mutation = gql(
         """
@@ -75,48 +304,20 @@ def copy_project(client: Client, owner_node_id: str, project_template_id: str, p
     except Exception as e:
         raise Exception(f"Error occurred while copying the template project: {str(e)}")
 
-def link_project_to_repo(client: Client, project_id: str, repo_node_id: str) -> str:
-    # GraphQL Mutation for linking a project to a repo
-    link_project_mutation = gql(
+def finalize_project(client: GraphQLSession, target_repo_name: str, project_id: str, repo_node_id: str, project_title: str):
+    # GraphQL runs top-level mutation fields sequentially, so the description
+    # update and the repo link can share one round-trip; only copyProjectV2
+    # has to run first (its output id is an input here)
+    finalize_project_mutation = gql(
         """
-        mutation LinkProjectV2ToRepository($input: LinkProjectV2ToRepositoryInput!) {
-            linkProjectV2ToRepository(input: $input) {
-                repository {
+        mutation FinalizeProjectV2($update: UpdateProjectV2Input!, $link: LinkProjectV2ToRepositoryInput!) {
+            updateProjectV2(input: $update) {
+                projectV2 {
                     __typename
                 }
             }
-        }
-    """
-    )
-
-    # Variables for the mutation
-    link_mutation_variables = {
-        "input": {
-            "projectId": project_id,
-            "repositoryId": repo_node_id,
-        }
-    }
-
-    try:
-        # Execute the mutation
-        response = client.execute(
-            link_project_mutation, variable_values=link_mutation_variables
-        )
-        print(
-            f"Project with id {project_id} has been successfully linked to the repo."
-        )
-        return project_id
-    except Exception as e:
-        raise Exception(f"Error occurred while linking the project to the repo: {str(e)}")
-
-
-def update_project(client: Client, target_repo_name: str, project_id: str, project_title: str):
-    # GraphQL Mutation for updating a project
-    update_project_mutation = gql(
-        """
-        mutation UpdateProjectV2($input: UpdateProjectV2Input!) {
-            updateProjectV2(input: $input) {
-                projectV2 {
+            linkProjectV2ToRepository(input: $link) {
+                repository {
                     __typename
                 }
             }
@@ -126,30 +327,27 @@ def update_project(client: Client, target_repo_name: str, project_id: str, proje
 
     project_description = f"A collaborative board for the {target_repo_name} audit"
 
-    # Variables for the mutation
-    update_mutation_variables = {
-        "input": {
+    finalize_mutation_variables = {
+        "update": {
             "projectId": project_id,
             "public": False,
             "shortDescription": project_description,
-        }
+        },
+        "link": {
+            "projectId": project_id,
+            "repositoryId": repo_node_id,
+        },
     }
 
     try:
-        # Execute the mutation
-        response = client.execute(
-            update_project_mutation, variable_values=update_mutation_variables
+        client.execute(
+            finalize_project_mutation, variable_values=finalize_mutation_variables
+        )
+        print(
+            f"Project {project_title} has been updated and linked to the repo successfully"
         )
-
-        # Check for errors
-        if "errors" in response:
-            error_messages = [error["message"] for error in response["errors"]]
-            error_text = "\n".join(error_messages)
-            raise Exception(f"GraphQL errors:\n{error_text}")
-        else:
-            print(f"Project {project_title} has been updated successfully")
     except Exception as e:
-        raise Exception(f"Error occurred while updating the project board description: {str(e)}")
+        raise Exception(f"Error occurred while finalizing the project: {str(e)}")
 
 
 def clone_project(repo: Repository, github_token: str, organization: str, target_repo_name: str, project_template_id: str, project_title: str) -> str:
@@ -168,12 +366,7 @@ def clone_project(repo: Repository, github_token: str, organization: str, target
     try:
         repo.edit(has_projects=True)
 
-        transport = RequestsHTTPTransport(
-            url="https://api.github.com/graphql",
-            headers={"Authorization": f"Bearer {github_token}"},
-            use_json=True,
-        )
-        client = Client(transport=transport, fetch_schema_from_transport=False)
+        client = make_graphql_client(github_token)
 
         repo_node_id, org_node_id, project_template_id = get_node_ids(client, organization, target_repo_name, int(project_template_id))
 
@@ -189,16 +382,11 @@ def clone_project(repo: Repository, github_token: str, organization: str, target
         raise Exception(f"Error occurred while cloning project: {str(e)}")
 
     try:
-        # it doesn't matter if this call fails, we can still use the project as it is only a description update
-        update_project(client, target_repo_name, project_node_id, project_title)
-    except Exception as e:
-        print(f"Error occurred while updating project: {str(e)}")
-
-    try:
-        # it doesn't matter if this call fails, we can still use the project as it is only a linking step
-        link_project_to_repo(client, project_node_id, repo_node_id)
+        # it doesn't matter if this call fails, we can still use the project as
+        # it only updates the description and links the repo
+        finalize_project(client, target_repo_name, project_node_id, repo_node_id, project_title)
     except Exception as e:
-        print(f"Error occurred while linking project to repo: {str(e)}")
+        print(f"Error occurred while finalizing project: {str(e)}")
 
     return project_node_id
 
@@ -1,5 +1,6 @@
 from setuptools import setup
 import os
+import re
 import sys
 
 CURRENT_PYTHON = sys.version_info[:2]
@@ -22,45 +23,33 @@ consider upgrading to a supported Python version.
 
 
 here = os.path.abspath(os.path.dirname(__file__))
-with open(os.path.join(here, "README.md"), "r") as f:
+with open(os.path.join(here, "README.md"), "r", encoding="utf-8") as f:
     readme = f.read()
 
-about = {}
-with open(os.path.join(here, "audit_repo_cloner", "__version__.py"), "r") as f:
-    exec(f.read(), about)
+# extract the metadata with a regex instead of exec()ing the module, which
+# compiled and ran it (side effects included) on every install
+with open(os.path.join(here, "audit_repo_cloner", "__version__.py"), "r", encoding="utf-8") as f:
+    version_source = f.read()
+about = {
+    f"__{key}__": re.search(
+        rf"__{key}__\s*=\s*['\"]([^'\"]+)['\"]", version_source
+    ).group(1)
+    for key in ("title", "version", "author", "license")
+}
 
 setup(
     name=about["__title__"],
     version=about["__version__"],
     author=about["__author__"],
     license=about["__license__"],
+    # direct imports only; everything else comes in transitively
     install_requires=[
-        "certifi",
-        "cffi",
-        "charset-normalizer",
         "click",
-        "cryptography",
-        "Deprecated",
-        "exceptiongroup",
-        "idna",
-        "iniconfig",
-        "numpy",
-        "packaging",
-        "pandocfilters",
-        "pluggy",
-        "pyasn1",
-        "pycparser",
+        "gql[requests]",
         "PyGithub",
-        "PyJWT",
         "PyNaCl",
-        "pytest",
         "python-dotenv",
-        "PyYAML",
-        "requests",
-        "rsa",
-        "tomli",
         "urllib3",
-        "wrapt"
     ],
     packages=[about["__title__"]],
     python_requires=">=3.7, <4",
@@ -0,0 +1,330 @@
+import os
+import re
+import tempfile
+import time
+import uuid
+import logging as log
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from dotenv import load_dotenv
+from gql import gql
+
+from audit_repo_cloner.github_client import call_with_retry, get_github_client
+from audit_repo_cloner.github_project_utils import make_graphql_client
+from tests._ratelimit import pace_client
+
+load_dotenv(override=True)
+
+GITHUB_TOKEN = os.getenv("GITHUB_ACCESS_TOKEN")
+GITHUB_ORGANIZATION = os.getenv("GITHUB_ORGANIZATION")
+
+# the integration tests talk to a real GitHub org; skip cleanly when the
+# credentials are not configured (e.g. on a contributor's machine)
+requires_github = pytest.mark.skipif(
+    not (GITHUB_TOKEN and GITHUB_ORGANIZATION),
+    reason="set GITHUB_ACCESS_TOKEN and GITHUB_ORGANIZATION to run integration tests",
+)
+
+# test repos are uuid-suffixed with one of these prefixes so stale ones can be
+# swept up by name and age
+TEST_REPO_PREFIXES = ["audit-repo-", "source-repo-", "multi-audit-repo-"]
+# one combined alternation: a single C-level match per candidate name instead
+# of trying several patterns in a Python-level any()
+TEST_REPO_RE = re.compile(
+    r"^(?:audit-repo-[0-9a-f]+|source-repo-(?:\d+-)?[0-9a-f]+|multi-audit-repo-[0-9a-f]+)$"
+)
+TEST_REPO_MAX_AGE_HOURS = 3
+
+_FIND_TEST_REPOS_QUERY = gql(
+    """
+    query FindTestRepos($search_query: String!, $cursor: String) {
+        search(query: $search_query, type: REPOSITORY, first: 100, after: $cursor) {
+            pageInfo {
+                endCursor
+                hasNextPage
+            }
+            nodes {
+                ... on Repository {
+                    name
+                }
+            }
+        }
+    }
+    """
+)
+
+
+# files every fixture source repo starts with, pushed as one commit
+SOURCE_REPO_FILES = {
+    "README.md": "# Test source repo\n\nFixture repo for audit-repo-cloner integration tests.\n",
+    "src/SimpleStorage.sol": (
+        "// SPDX-License-Identifier: MIT\n"
+        "pragma solidity ^0.8.0;\n\n"
+        "contract SimpleStorage {\n"
+        "    uint256 public value;\n\n"
+        "    function setValue(uint256 newValue) external {\n"
+        "        value = newValue;\n"
+        "    }\n"
+        "}\n"
+    ),
+    "foundry.toml": "[profile.default]\nsrc = \"src\"\n",
+    ".github/workflows/test.yml": (
+        "name: test\non: push\njobs:\n  test:\n    runs-on: ubuntu-latest\n"
+        "    steps:\n      - uses: actions/checkout@v4\n"
+    ),
+}
+
+
+def random_repo_name(prefix: str) -> str:
+    return f"{prefix}{uuid.uuid4().hex[:12]}"
+
+
+def wait_until_ready(repo, timeout: float = 10.0):
+    """Poll until a freshly-created repo is ready to take pushes.
+
+    ``create_repo(auto_init=True)`` returns before the initial commit is
+    visible, so the first ref lookup can briefly 404. A bounded poll with
+    exponential backoff returns the main ref as soon as the API serves it —
+    typically on the first probe — instead of a fixed settle sleep that costs
+    seconds on every fixture build.
+    """
+    from github import GithubException
+
+    deadline = time.monotonic() + timeout
+    delay = 0.2
+    while True:
+        try:
+            return repo.get_git_ref("heads/main")
+        except GithubException:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
+
+
+def seed_repo_files(repo, files: dict, message: str = "Add test fixtures") -> str:
+    """Push all fixture files to main as one commit via the Git Data API.
+
+    One tree + one commit + one ref update instead of a create_file round-trip
+    (each its own commit) per file; the readiness poll doubles as the ref
+    lookup the commit build needs anyway.
+
+    Returns the sha of the pushed commit.
+    """
+    from github.InputGitTreeElement import InputGitTreeElement
+
+    ref = wait_until_ready(repo)
+    base_commit = repo.get_git_commit(ref.object.sha)
+    tree = repo.create_git_tree(
+        [
+            InputGitTreeElement(path, "100644", "blob", content=content)
+            for path, content in files.items()
+        ],
+        base_tree=base_commit.tree,
+    )
+    commit = repo.create_git_commit(message, tree, [base_commit])
+    ref.edit(commit.sha)
+    return commit.sha
+
+
+def delete_repos(github_org, repo_names):
+    """Delete repos in parallel; each delete is an independent round trip."""
+
+    def _safe_delete(repo_name):
+        try:
+            call_with_retry(github_org.get_repo(repo_name).delete)
+        except Exception as e:
+            log.warning(f"Could not delete {repo_name}: {e}")
+
+    with ThreadPoolExecutor(max_workers=max(1, len(repo_names))) as executor:
+        list(executor.map(_safe_delete, repo_names))
+
+
+@pytest.fixture(scope="session")
+def session_source_repo(github_org):
+    """One seeded source repo shared by every single-repo test.
+
+    The cloner only ever reads the source repo, so building it once per
+    session (per xdist worker) is safe and drops the create+seed+delete
+    chain from every test that needs a source.
+    """
+    repo = github_org.create_repo(
+        random_repo_name("source-repo-"), private=True, auto_init=True
+    )
+    commit_hash = seed_repo_files(repo, SOURCE_REPO_FILES)
+
+    yield {"source_repo": repo, "commit_hash": commit_hash}
+
+    try:
+        call_with_retry(repo.delete)
+    except Exception as e:
+        log.warning(f"Could not delete {repo.name}: {e}")
+
+
+@pytest.fixture(scope="session")
+def session_source_repos(github_org):
+    """Two seeded source repos shared by every multi-repo test.
+
+    The source repos are independent create+seed API chains, so they are
+    built concurrently; results are collected through executor.map rather
+    than mutating a shared list from the workers.
+    """
+
+    def make_source(index):
+        repo = github_org.create_repo(
+            random_repo_name(f"source-repo-{index}-"), private=True, auto_init=True
+        )
+        commit_hash = seed_repo_files(repo, SOURCE_REPO_FILES)
+        return {"source_repo": repo, "commit_hash": commit_hash}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        sources = list(executor.map(make_source, range(2)))
+
+    yield sources
+
+    delete_repos(github_org, [source["source_repo"].name for source in sources])
+
+
+@pytest.fixture
+def temp_github_repos(github_org, session_source_repo):
+    """The shared source repo plus a fresh target repo name for one test.
+
+    Only the per-test target repo is deleted on teardown; anything that
+    survives an aborted run is swept up by the next run started with
+    CLEANUP_TEST_REPOS=1 (see pytest_sessionfinish).
+    """
+    target_repo_name = random_repo_name("audit-repo-")
+
+    yield {**session_source_repo, "target_repo_name": target_repo_name}
+
+    delete_repos(github_org, [target_repo_name])
+
+
+@pytest.fixture
+def multi_repo_setup(github_org, session_source_repos):
+    """The shared source repos plus fresh target repo names for one test."""
+    target_repo_names = [
+        random_repo_name("multi-audit-repo-") for _ in session_source_repos
+    ]
+
+    yield {"sources": session_source_repos, "target_repo_names": target_repo_names}
+
+    delete_repos(github_org, target_repo_names)
+
+
+@pytest.fixture
+def fast_tmp_path():
+    """A scratch dir on tmpfs (/dev/shm) when the host has one.
+
+    The filesystem-heavy tests create and delete hundreds of small files;
+    pointing them at a ramdisk turns that into pure memory ops. Falls back
+    to the default temp dir elsewhere.
+    """
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    with tempfile.TemporaryDirectory(dir=base) as temp_dir:
+        yield Path(temp_dir)
+
+
+# one authenticated client and one org lookup for the whole test session;
+# get_github_client already configures per_page=100 and retry/backoff, and
+# pace_client keeps the suite's request rate under the secondary limiter
+@pytest.fixture(scope="session")
+def github_client():
+    return pace_client(get_github_client(GITHUB_TOKEN))
+
+
+@pytest.fixture(scope="session")
+def github_org(github_client):
+    return github_client.get_organization(GITHUB_ORGANIZATION)
+
+
+def find_test_repos(github_token: str, organization: str) -> list:
+    """Find recently-created test repos with a server-side GraphQL search.
+
+    Searching with ``org:`` + ``created:>=`` + ``in:name`` qualifiers returns
+    only candidate repos in one request per prefix, instead of paging every
+    repository in the org through REST and filtering client-side.
+    """
+    client = make_graphql_client(github_token)
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=TEST_REPO_MAX_AGE_HOURS)
+    cutoff_iso = cutoff.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+    names = []
+    for prefix in TEST_REPO_PREFIXES:
+        cursor = None
+        while True:
+            response = client.execute(
+                _FIND_TEST_REPOS_QUERY,
+                variable_values={
+                    "search_query": f"org:{organization} created:>={cutoff_iso} {prefix} in:name",
+                    "cursor": cursor,
+                },
+            )
+            search = response["search"]
+            names.extend(node["name"] for node in search["nodes"] if node)
+            if not search["pageInfo"]["hasNextPage"]:
+                break
+            cursor = search["pageInfo"]["endCursor"]
+
+    # search matches loosely on name; keep only repos our fixtures created
+    return [name for name in names if TEST_REPO_RE.match(name)]
+
+
+def cleanup_test_repos(github_token: str = None, organization: str = None, dry_run: bool = False) -> int:
+    """Delete test repos left behind by aborted integration runs.
+
+    Returns the number of repos deleted (or that would be deleted with
+    ``dry_run=True``).
+    """
+    github_token = github_token or GITHUB_TOKEN
+    organization = organization or GITHUB_ORGANIZATION
+
+    names = find_test_repos(github_token, organization)
+    if dry_run:
+        for name in names:
+            log.info(f"[dry run] would delete {organization}/{name}")
+        return len(names)
+
+    client = get_github_client(github_token)
+
+    def delete_repo(name):
+        call_with_retry(client.get_repo(f"{organization}/{name}").delete)
+
+    # deletions are independent round-trips: overlap them, but keep the pool
+    # small and pace submissions to stay under the secondary rate limiter
+    deleted = 0
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {}
+        for name in names:
+            futures[executor.submit(delete_repo, name)] = name
+            time.sleep(0.2)
+        for future in as_completed(futures):
+            if future.exception() is None:
+                deleted += 1
+            else:
+                log.warning(
+                    f"Could not delete {organization}/{futures[future]}: {future.exception()}"
+                )
+    return deleted
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Sweep stale test repos after the run when CLEANUP_TEST_REPOS=1.
+
+    Opt-in because the sweep deletes by name pattern and age across the
+    whole org, which would race against any other run sharing the org —
+    set the variable on the one scheduled/janitorial run, not everywhere.
+    Only the xdist controller (or a non-xdist run) sweeps, so the fixture
+    teardowns of every worker have already finished.
+    """
+    if os.getenv("CLEANUP_TEST_REPOS") != "1":
+        return
+    if hasattr(session.config, "workerinput"):
+        return
+    if not (GITHUB_TOKEN and GITHUB_ORGANIZATION):
+        return
+    deleted = cleanup_test_repos()
+    log.info(f"cleanup_test_repos: deleted {deleted} stale test repo(s)")
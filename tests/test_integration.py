@@ -0,0 +1,136 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from click.testing import CliRunner
+
+from audit_repo_cloner.create_audit_repo import create_audit_repo
+from tests.conftest import (
+    GITHUB_ORGANIZATION,
+    GITHUB_TOKEN,
+    requires_github,
+)
+from tests.test_utils import (
+    check_git_history,
+    clone_repo_to_temp,
+    has_report_workflow,
+    tree_paths,
+    wait_until,
+)
+
+AUDITORS = "alice bob"
+EXPECTED_BRANCHES = {"main", "report", "audit/alice", "audit/bob"}
+
+# compiled once at import instead of per assertion call
+SUBTREE_INSTALL_PATTERN = re.compile(r"install: report-generator-template")
+
+
+def run_cloner(source_repo, target_repo_name: str, commit_hash: str):
+    runner = CliRunner()
+    result = runner.invoke(
+        create_audit_repo,
+        [
+            "--source-url", source_repo.html_url,
+            "--target-repo-name", target_repo_name,
+            "--commit-hash", commit_hash,
+            "--auditors", AUDITORS,
+            "--github-token", GITHUB_TOKEN,
+            "--organization", GITHUB_ORGANIZATION,
+            "--project-title", f"Audit board for {target_repo_name}",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    return result
+
+
+def get_repo_or_none(github_org, repo_name: str):
+    from github import GithubException
+
+    try:
+        return github_org.get_repo(repo_name)
+    except GithubException:
+        return None
+
+
+def assert_audit_repo_is_set_up(github_org, target_repo_name: str, tmp_path_factory):
+    # a freshly-created repo can 404 for a moment; poll instead of sleeping
+    target_repo = wait_until(lambda: get_repo_or_none(github_org, target_repo_name))
+
+    # each lookup is an independent API round trip, so fetch them all once,
+    # concurrently, instead of paying the latency serially
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        branches = executor.submit(
+            lambda: {branch.name for branch in target_repo.get_branches()}
+        )
+        labels = executor.submit(
+            lambda: {label.name for label in target_repo.get_labels()}
+        )
+        tags = executor.submit(lambda: {tag.name for tag in target_repo.get_tags()})
+        main_paths = executor.submit(tree_paths, target_repo, "main")
+        report_paths = executor.submit(tree_paths, target_repo, "report")
+
+    assert EXPECTED_BRANCHES <= branches.result()
+    # one tree fetch answers every file-existence check on main
+    assert {".github/ISSUE_TEMPLATE/finding.md", "src/SimpleStorage.sol"} <= main_paths.result()
+    assert "Severity: Critical Risk" in labels.result()
+    assert "cyfrin-audit" in tags.result()
+
+    # the template's report workflow is moved to the repo root, so no
+    # workflow files should be left behind inside the subtree; one recursive
+    # tree fetch answers this without walking the local clone
+    subtree_workflows_prefix = "cyfrin-report/report-generator-template/.github/workflows/"
+    assert not any(
+        path.startswith(subtree_workflows_prefix) and path.endswith((".yml", ".yaml"))
+        for path in report_paths.result()
+    )
+
+    clone_url = target_repo.clone_url.replace(
+        "https://", f"https://{GITHUB_TOKEN}@"
+    )
+    # cloning into a pytest-managed dir leaves cleanup to pytest's own
+    # basetemp rotation instead of an explicit rmtree per verification
+    target_repo_path = clone_repo_to_temp(
+        clone_url,
+        branch="report",
+        single_branch=True,
+        dest=str(tmp_path_factory.mktemp("audit-clone")),
+        # only the root workflow files need real contents in the worktree
+        sparse_paths=[".github"],
+    )
+    history = check_git_history(target_repo_path, [SUBTREE_INSTALL_PATTERN])
+    assert all(history.values()), history
+
+    # the report workflow lands at the repo root; this needs file contents,
+    # so it stays on the clone
+    assert has_report_workflow(target_repo_path)
+
+
+@requires_github
+def test_single_repo_cloning(github_org, temp_github_repos, tmp_path_factory):
+    source_repo = temp_github_repos["source_repo"]
+    target_repo_name = temp_github_repos["target_repo_name"]
+
+    run_cloner(source_repo, target_repo_name, temp_github_repos["commit_hash"])
+
+    assert_audit_repo_is_set_up(github_org, target_repo_name, tmp_path_factory)
+
+
+@requires_github
+def test_multi_repo_cloning(github_org, multi_repo_setup, tmp_path_factory):
+    pairs = list(
+        zip(multi_repo_setup["target_repo_names"], multi_repo_setup["sources"])
+    )
+    # the CLI runs stay serial (each invocation owns the process cwd-level
+    # state), but verification of the finished repos is independent
+    for target_repo_name, source in pairs:
+        run_cloner(source["source_repo"], target_repo_name, source["commit_hash"])
+
+    with ThreadPoolExecutor(max_workers=len(pairs)) as executor:
+        futures = [
+            executor.submit(
+                assert_audit_repo_is_set_up, github_org, target_repo_name, tmp_path_factory
+            )
+            for target_repo_name, _ in pairs
+        ]
+        for future in futures:
+            future.result()
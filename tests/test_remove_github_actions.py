@@ -0,0 +1,57 @@
+import os
+import time
+
+from tests.test_utils import has_github_action_path, remove_github_actions
+
+
+def _seed_actions(root):
+    workflows = root / ".github" / "workflows"
+    workflows.mkdir(parents=True)
+    (workflows / "test.yml").write_text("name: test\non: push\n")
+    (workflows / "release.yaml").write_text("name: release\non: push\n")
+    action = root / ".github" / "actions" / "setup"
+    action.mkdir(parents=True)
+    (action / "action.yml").write_text("name: setup\nruns:\n  using: composite\n")
+
+
+def test_remove_github_actions(fast_tmp_path):
+    _seed_actions(fast_tmp_path)
+    (fast_tmp_path / ".github" / "ISSUE_TEMPLATE").mkdir()
+    (fast_tmp_path / ".github" / "ISSUE_TEMPLATE" / "finding.md").write_text("# finding\n")
+
+    remove_github_actions(str(fast_tmp_path))
+
+    assert not has_github_action_path(str(fast_tmp_path))
+    # everything else under .github survives
+    assert (fast_tmp_path / ".github" / "ISSUE_TEMPLATE" / "finding.md").exists()
+
+
+def test_remove_github_actions_is_scoped_to_the_given_root(fast_tmp_path):
+    _seed_actions(fast_tmp_path)
+    nested = fast_tmp_path / "vendored" / "sub-repo"
+    _seed_actions(nested)
+
+    remove_github_actions(str(fast_tmp_path))
+
+    assert not (fast_tmp_path / ".github" / "workflows").exists()
+    assert (nested / ".github" / "workflows" / "test.yml").exists()
+
+
+def test_remove_github_actions_does_not_scale_with_tree_size(fast_tmp_path):
+    _seed_actions(fast_tmp_path)
+    # a large unrelated subtree must not slow the removal down: the helper
+    # works by exact path and never walks the tree
+    docs = fast_tmp_path / "docs"
+    for i in range(50):
+        chapter = docs / f"chapter-{i}"
+        chapter.mkdir(parents=True)
+        for j in range(40):
+            (chapter / f"page-{j}.md").write_text("lorem ipsum\n")
+
+    started = time.perf_counter()
+    remove_github_actions(str(fast_tmp_path))
+    elapsed = time.perf_counter() - started
+
+    assert not has_github_action_path(str(fast_tmp_path))
+    assert elapsed < 0.25, f"removal took {elapsed:.3f}s; should not scan the tree"
+    assert sum(1 for _ in os.scandir(docs)) == 50
@@ -0,0 +1,203 @@
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+
+
+def wait_until(predicate, timeout: float = 30, interval: float = 0.5):
+    """Poll until the predicate returns something truthy, and return it.
+
+    Bounded event-driven polling instead of a fixed propagation sleep: the
+    wait ends as soon as the condition actually holds, which is usually
+    well under a second.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        value = predicate()
+        if value:
+            return value
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"condition not met within {timeout}s")
+        time.sleep(interval)
+
+
+def clone_repo_to_temp(
+    repo_url: str,
+    branch: str = None,
+    blobless: bool = True,
+    single_branch: bool = False,
+    dest: str = None,
+    sparse_paths: list = None,
+) -> str:
+    """Clone a repo into a temp dir and return the path.
+
+    Defaults to a blobless partial clone (``--filter=blob:none``): full
+    history is available for git log checks, but file contents are only
+    fetched for the checked-out tip, which keeps both the clone and the
+    teardown of its ``.git`` cheap. Pass ``single_branch=True`` when only
+    the requested branch matters to skip fetching the other refs, and
+    ``sparse_paths`` to materialize (and fetch blobs for) only those
+    top-level directories. ``dest`` lets callers supply a pytest-managed
+    directory (tmp_path_factory) so cleanup is pytest's problem, not a
+    per-test rmtree.
+    """
+    temp_dir = dest or tempfile.mkdtemp()
+    git_command = ["git", "clone", repo_url, temp_dir]
+    if blobless:
+        git_command += ["--filter=blob:none", "--no-tags"]
+    if single_branch:
+        git_command.append("--single-branch")
+    if branch:
+        git_command += ["--branch", branch]
+    if sparse_paths:
+        git_command.append("--sparse")
+    subprocess.run(git_command, check=True, capture_output=True, close_fds=False)
+    if sparse_paths:
+        subprocess.run(
+            ["git", "-C", temp_dir, "sparse-checkout", "set"] + list(sparse_paths),
+            check=True,
+            capture_output=True,
+            close_fds=False,
+        )
+    return temp_dir
+
+
+def tree_paths(repo, ref: str) -> set:
+    """Return every path on a branch as a set, from one recursive tree fetch.
+
+    A single Git Trees API call replaces per-path ``get_contents`` probes
+    (and any local clone walk) for structural this-path-exists checks.
+    """
+    commit_sha = repo.get_branch(ref).commit.sha
+    return {element.path for element in repo.get_git_tree(commit_sha, recursive=True).tree}
+
+
+def check_git_history(repo_path: str, patterns: list) -> dict:
+    """Check which patterns appear anywhere in the commit messages.
+
+    Both dispatch paths search the full history and match each pattern
+    against individual message lines (subject and body). For a few
+    patterns (the usual case), matching runs inside git itself:
+    ``git log -E --grep --max-count=1`` stops at the first matching commit
+    with the regex evaluated in C, so only the verdict crosses the pipe —
+    patterns must therefore stay ERE-compatible. With many patterns the
+    crossover favors one streamed ``git log`` matched in Python, with an
+    early break once every pattern has hit. Patterns may be strings or
+    pre-compiled. Returns {pattern: True/False}.
+    """
+    if len(patterns) <= 3:
+        results = {}
+        for pattern in patterns:
+            source = pattern.pattern if hasattr(pattern, "pattern") else pattern
+            completed_process = subprocess.run(
+                [
+                    "git", "-C", repo_path, "log", "-E",
+                    "--grep", source, "--format=%s", "--max-count=1",
+                ],
+                text=True,
+                capture_output=True,
+                check=True,
+                close_fds=False,
+            )
+            results[pattern] = bool(completed_process.stdout.strip())
+        return results
+
+    compiled = [(pattern, re.compile(pattern)) for pattern in patterns]
+    results = {pattern: False for pattern in patterns}
+    # %B streams every message line, mirroring --grep's line-wise matching
+    process = subprocess.Popen(
+        ["git", "-C", repo_path, "log", "--format=%B"],
+        stdout=subprocess.PIPE,
+        text=True,
+        close_fds=False,
+    )
+    try:
+        for subject in process.stdout:
+            for pattern, regex in compiled:
+                if not results[pattern] and regex.search(subject):
+                    results[pattern] = True
+            if all(results.values()):
+                break
+    finally:
+        process.stdout.close()
+        process.wait()
+    return results
+
+
+_WORKFLOW_SUFFIXES = (".yml", ".yaml")
+
+REPORT_WORKFLOW_PATTERN = re.compile(
+    r"(generate[_-]report|report[_-]generator)", re.IGNORECASE
+)
+
+
+def has_report_workflow(repo_path: str) -> bool:
+    """Check whether a report-generation workflow exists at the repo root.
+
+    Streams each workflow file line by line and stops at the first match
+    instead of slurping every file; candidates with "report" in the name
+    are tried first so the common case touches one file.
+    """
+    workflows_dir = os.path.join(repo_path, ".github", "workflows")
+    if not os.path.isdir(workflows_dir):
+        return False
+    # one scandir gives names and joined paths together; no per-file join
+    with os.scandir(workflows_dir) as entries:
+        candidates = [
+            (entry.name, entry.path)
+            for entry in entries
+            if entry.name.endswith(_WORKFLOW_SUFFIXES)
+        ]
+    for _, path in sorted(candidates, key=lambda c: "report" not in c[0].lower()):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                # cheap substring gate: every match contains "report", and
+                # str membership is far cheaper than the alternation regex
+                if "report" in line.lower() and REPORT_WORKFLOW_PATTERN.search(line):
+                    return True
+    return False
+
+
+def has_github_action_path(repo_path: str) -> bool:
+    """Return True as soon as any workflow file is found under the path.
+
+    For asserts that only care whether workflows exist at all: an
+    iterative scandir walk (DirEntry carries type info from getdents, so
+    no per-entry stat) that returns on the first hit and skips .git
+    object stores entirely.
+    """
+    stack = [repo_path]
+    while stack:
+        current = stack.pop()
+        in_workflows = current.endswith(os.path.join(".github", "workflows"))
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != ".git":
+                        stack.append(entry.path)
+                elif in_workflows and entry.name.endswith((".yml", ".yaml")):
+                    return True
+    return False
+
+
+def remove_github_actions(repo_path: str):
+    """Strip GitHub Actions config from one checkout root by exact path.
+
+    Workflows can only live at ``{root}/.github/workflows`` and reusable
+    actions under ``{root}/.github/actions``, so this deletes those
+    locations directly — constant work regardless of how large the rest
+    of the tree is, with no discovery walk. Scoped to the given root:
+    nested checkouts keep their own ``.github`` untouched.
+    """
+    shutil.rmtree(os.path.join(repo_path, ".github", "workflows"), ignore_errors=True)
+    actions_dir = os.path.join(repo_path, ".github", "actions")
+    if os.path.isdir(actions_dir):
+        with os.scandir(actions_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                else:
+                    os.unlink(entry.path)
+        os.rmdir(actions_dir)